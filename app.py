@@ -5,9 +5,11 @@ A smart email cleanup tool that helps you delete old unread emails
 with AI-powered recommendations and filtering.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 
-from config import APP_TITLE, APP_ICON
+from config import APP_TITLE, APP_ICON, MAX_EMAILS_PER_FETCH
 from auth.gmail_auth import (
     init_auth_state,
     is_authenticated,
@@ -15,22 +17,35 @@ from auth.gmail_auth import (
     exchange_code_for_credentials,
     get_gmail_service,
     get_user_email,
+    get_user_cache_key,
     logout,
 )
 from services.gmail_service import (
     build_search_query,
+    cached_fetch_emails,
+    cached_get_labels,
     fetch_emails,
     get_labels,
     get_sender_stats,
+    build_sender_index,
+    find_emails_by_senders,
+    remove_from_sender_index,
+    subtract_sender_stats,
     batch_trash_emails,
 )
 from services.ai_service import (
     categorize_senders,
+    basic_summary,
     generate_deletion_summary,
     get_smart_recommendations,
 )
 from components.sidebar import render_sidebar_filters, render_sidebar_stats
-from components.email_list import render_email_table, render_sender_breakdown
+from components.email_list import (
+    add_display_fields,
+    render_email_table,
+    render_sender_breakdown,
+    set_selected_emails,
+)
 from components.action_log import render_action_log, render_compact_log
 from utils.logger import (
     ActionLogger,
@@ -51,8 +66,8 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS, collapsed to a single line to keep the per-rerun delta small
+APP_CSS = " ".join("""
 <style>
     .stApp {
         background: linear-gradient(135deg, #0e1117 0%, #1a1a2e 100%);
@@ -87,7 +102,17 @@ st.markdown("""
         background: #0e1117;
     }
 </style>
-""", unsafe_allow_html=True)
+""".split())
+
+
+def inject_css():
+    """
+    Emit the app stylesheet.
+    
+    Streamlit drops elements that are not re-emitted on a rerun, so this
+    runs on every rerun rather than once per session.
+    """
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 
 def init_app_state():
@@ -99,10 +124,18 @@ def init_app_state():
         st.session_state.emails = []
     if "sender_stats" not in st.session_state:
         st.session_state.sender_stats = {}
+    if "sender_to_ids" not in st.session_state:
+        st.session_state.sender_to_ids = {}
     if "labels" not in st.session_state:
         st.session_state.labels = []
     if "categories" not in st.session_state:
         st.session_state.categories = None
+    if "categories_future" not in st.session_state:
+        st.session_state.categories_future = None
+    if "summary" not in st.session_state:
+        st.session_state.summary = None
+    if "summary_future" not in st.session_state:
+        st.session_state.summary_future = None
     if "last_query" not in st.session_state:
         st.session_state.last_query = None
 
@@ -196,20 +229,25 @@ def render_main_dashboard():
         if st.button("🚪 Logout", use_container_width=True):
             log_auth_logout()
             logout()
+            st.session_state.categories_future = None
+            st.session_state.summary_future = None
+            st.session_state.summary = None
             st.session_state.emails = []
             st.session_state.sender_stats = {}
+            st.session_state.sender_to_ids = {}
             st.rerun()
     
-    # Fetch labels if not already done
-    if not st.session_state.labels:
-        st.session_state.labels = get_labels(st.session_state.gmail_service)
+    # Fetch labels (cached per user, so only the first rerun hits the API)
+    st.session_state.labels = load_labels()
     
-    # Sidebar filters
-    filters = render_sidebar_filters(st.session_state.labels)
+    # Sidebar filters (submitting the form fetches with the entered values)
+    filters, submitted, reload = render_sidebar_filters(st.session_state.labels)
     
-    # Fetch button
-    st.sidebar.divider()
-    if st.sidebar.button("🔍 Fetch Emails", type="primary", use_container_width=True):
+    if submitted:
+        fetch_and_analyze_emails(filters)
+    if reload:
+        cached_fetch_emails.clear()
+        cached_get_labels.clear()
         fetch_and_analyze_emails(filters)
     
     # Sidebar stats
@@ -221,6 +259,9 @@ def render_main_dashboard():
     st.sidebar.subheader("📜 Recent Actions")
     render_compact_log(5)
     
+    # Pick up background AI results before rendering the tabs
+    collect_ai_results()
+    
     # Main content tabs
     tab1, tab2, tab3 = st.tabs(["📬 Emails", "💡 Recommendations", "📜 Action Log"])
     
@@ -234,6 +275,17 @@ def render_main_dashboard():
         render_action_log()
 
 
+def load_labels() -> list[dict[str, str]]:
+    """Get the user's Gmail labels, or an empty list if they can't be loaded."""
+    user_key = get_user_cache_key()
+    try:
+        if user_key:
+            return cached_get_labels(user_key, st.session_state.gmail_service)
+        return get_labels(st.session_state.gmail_service)
+    except Exception:
+        return []
+
+
 def fetch_and_analyze_emails(filters: dict):
     """Fetch emails based on filters and analyze them."""
     with st.spinner("Fetching emails..."):
@@ -248,9 +300,32 @@ def fetch_and_analyze_emails(filters: dict):
         # Store query for display
         st.session_state.last_query = query
         
-        emails = fetch_emails(st.session_state.gmail_service, query)
+        # Results are cached per user; without a user key nothing is cached
+        user_key = get_user_cache_key()
+        try:
+            if user_key:
+                emails = cached_fetch_emails(
+                    user_key,
+                    query,
+                    MAX_EMAILS_PER_FETCH,
+                    st.session_state.gmail_service,
+                    st.session_state.credentials,
+                )
+            else:
+                emails = fetch_emails(
+                    st.session_state.gmail_service,
+                    st.session_state.credentials,
+                    query,
+                    MAX_EMAILS_PER_FETCH,
+                )
+        except Exception as e:
+            log_error(f"Fetching emails failed: {str(e)}", {"query": query})
+            st.error(f"Error fetching emails: {str(e)}")
+            return
+        
+        add_display_fields(emails)
         st.session_state.emails = emails
-        st.session_state.selected_emails = set()
+        set_selected_emails(())
         
         # Log the fetch
         log_fetch_emails(len(emails), query)
@@ -258,20 +333,26 @@ def fetch_and_analyze_emails(filters: dict):
         if emails:
             # Calculate sender stats
             st.session_state.sender_stats = get_sender_stats(emails)
+            st.session_state.sender_to_ids = build_sender_index(emails)
             
-            # AI categorization (if OpenAI is configured)
-            with st.spinner("Analyzing emails with AI..."):
-                try:
-                    categories = categorize_senders(st.session_state.sender_stats)
-                    st.session_state.categories = categories
-                    log_ai_analysis("categorization", f"Categorized {len(st.session_state.sender_stats)} senders")
-                except Exception as e:
-                    st.session_state.categories = None
+            # AI categorization and summary (if OpenAI is configured) run
+            # concurrently in the background so the email list is usable
+            # while they complete
+            st.session_state.categories = None
+            st.session_state.categories_future = get_ai_executor().submit(
+                categorize_senders,
+                st.session_state.sender_stats,
+            )
+            start_ai_summary()
             
             st.success(f"Found {len(emails)} emails matching your filters!")
         else:
             st.session_state.sender_stats = {}
+            st.session_state.sender_to_ids = {}
             st.session_state.categories = None
+            st.session_state.categories_future = None
+            st.session_state.summary = None
+            st.session_state.summary_future = None
             st.info(f"No emails found matching your filters.")
             st.caption(f"Query used: `{query}`")
 
@@ -284,38 +365,42 @@ def render_emails_tab():
         st.info("👆 Use the filters in the sidebar and click 'Fetch Emails' to get started.")
         return
     
-    # Summary
-    summary = generate_deletion_summary(emails, st.session_state.sender_stats)
+    # Summary (the basic summary is shown until the AI one is ready)
+    summary = st.session_state.summary or basic_summary(emails, st.session_state.sender_stats)
     st.markdown(f"""
     <div class="stats-card">
         <h4>📊 Summary</h4>
         <p>{summary}</p>
     </div>
     """, unsafe_allow_html=True)
+    if st.session_state.summary_future is not None:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.caption("🤖 AI summary is still being generated.")
+        with col2:
+            if st.button("🔄 Refresh", key="refresh_summary_btn", use_container_width=True):
+                st.rerun()
     
     st.divider()
     
-    # Email list with selection
-    selected_ids = render_email_table(emails, st.session_state.sender_stats)
+    # Email list with selection; Delete applies the current ticks first
+    selected_ids, delete_clicked = render_email_table(emails, st.session_state.sender_stats)
     
-    # Delete button
-    if selected_ids:
-        st.divider()
-        col1, col2, col3 = st.columns([2, 1, 2])
-        
-        with col2:
-            if st.button(
-                f"🗑️ Delete {len(selected_ids)} Emails",
-                type="primary",
-                use_container_width=True,
-            ):
-                delete_selected_emails(selected_ids)
+    if delete_clicked:
+        if selected_ids:
+            delete_selected_emails(selected_ids)
+        else:
+            st.warning("Select at least one email to delete.")
 
 
 def delete_selected_emails(email_ids: list[str]):
     """Delete the selected emails."""
     with st.spinner(f"Moving {len(email_ids)} emails to trash..."):
-        result = batch_trash_emails(st.session_state.gmail_service, email_ids)
+        result = batch_trash_emails(
+            st.session_state.gmail_service,
+            st.session_state.credentials,
+            email_ids,
+        )
         
         # Log the deletion
         log_emails_deleted(
@@ -327,16 +412,31 @@ def delete_selected_emails(email_ids: list[str]):
         if result["success"] > 0:
             st.success(f"✅ Successfully moved {result['success']} emails to trash!")
             
+            # Cached fetches would still contain the trashed emails
+            cached_fetch_emails.clear()
+            
             # Remove deleted emails from state
             deleted_set = set(email_ids)
+            deleted_emails = [e for e in st.session_state.emails if e["id"] in deleted_set]
             st.session_state.emails = [
                 e for e in st.session_state.emails
                 if e["id"] not in deleted_set
             ]
-            st.session_state.selected_emails = set()
+            set_selected_emails(())
+            
+            # Update sender stats for just the deleted emails
+            st.session_state.sender_stats = subtract_sender_stats(
+                st.session_state.sender_stats,
+                deleted_emails,
+            )
+            remove_from_sender_index(st.session_state.sender_to_ids, deleted_emails)
             
-            # Update sender stats
-            st.session_state.sender_stats = get_sender_stats(st.session_state.emails)
+            # The summary describes the remaining emails
+            if st.session_state.emails:
+                start_ai_summary()
+            else:
+                st.session_state.summary = None
+                st.session_state.summary_future = None
         
         if result["failed"] > 0:
             st.warning(f"⚠️ Failed to delete {result['failed']} emails.")
@@ -344,6 +444,42 @@ def delete_selected_emails(email_ids: list[str]):
                 st.error(error)
 
 
+@st.cache_resource
+def get_ai_executor() -> ThreadPoolExecutor:
+    """Get the shared thread pool used for background AI calls."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+def start_ai_summary():
+    """Generate the deletion summary for the current emails in the background."""
+    st.session_state.summary = None
+    st.session_state.summary_future = get_ai_executor().submit(
+        generate_deletion_summary,
+        st.session_state.emails,
+        st.session_state.sender_stats,
+    )
+
+
+def collect_ai_results():
+    """Store background AI results that have finished since the last rerun."""
+    future = st.session_state.categories_future
+    if future is not None and future.done():
+        st.session_state.categories_future = None
+        try:
+            st.session_state.categories = future.result()
+            log_ai_analysis("categorization", f"Categorized {len(st.session_state.sender_stats)} senders")
+        except Exception:
+            st.session_state.categories = None
+    
+    future = st.session_state.summary_future
+    if future is not None and future.done():
+        st.session_state.summary_future = None
+        try:
+            st.session_state.summary = future.result()
+        except Exception:
+            st.session_state.summary = None
+
+
 def render_recommendations_tab():
     """Render the AI recommendations tab."""
     st.subheader("💡 Smart Recommendations")
@@ -352,6 +488,14 @@ def render_recommendations_tab():
         st.info("Fetch emails first to get AI-powered recommendations.")
         return
     
+    if st.session_state.categories_future is not None:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.info("🤖 AI categorization is still running; category recommendations will appear when it finishes.")
+        with col2:
+            if st.button("🔄 Refresh", key="refresh_categories_btn", use_container_width=True):
+                st.rerun()
+    
     recommendations = get_smart_recommendations(
         st.session_state.emails,
         st.session_state.sender_stats,
@@ -370,11 +514,8 @@ def render_recommendations_tab():
     
     def on_select_sender(sender: str):
         """Select all emails from a specific sender."""
-        matching_ids = {
-            e["id"] for e in st.session_state.emails
-            if sender in e.get("from", "")
-        }
-        st.session_state.selected_emails.update(matching_ids)
+        matching_ids = find_emails_by_senders(st.session_state.sender_to_ids, [sender])
+        set_selected_emails(st.session_state.selected_emails | matching_ids)
         st.rerun()
     
     render_sender_breakdown(st.session_state.sender_stats, on_select_sender)
@@ -418,21 +559,16 @@ def render_recommendation_card(rec: dict):
     if rec.get("senders"):
         if st.button(f"Select {rec['title']}", key=f"rec_{rec['title'][:20]}"):
             # Select emails from these senders
-            matching_ids = set()
-            for email in st.session_state.emails:
-                sender = email.get("from", "")
-                for rec_sender in rec["senders"]:
-                    if rec_sender in sender:
-                        matching_ids.add(email["id"])
-                        break
+            matching_ids = find_emails_by_senders(st.session_state.sender_to_ids, rec["senders"])
             
-            st.session_state.selected_emails.update(matching_ids)
+            set_selected_emails(st.session_state.selected_emails | matching_ids)
             st.success(f"Selected {len(matching_ids)} emails!")
             st.rerun()
 
 
 def main():
     """Main application entry point."""
+    inject_css()
     init_app_state()
     
     if is_authenticated():
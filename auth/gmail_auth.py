@@ -1,5 +1,6 @@
 """Google OAuth2 authentication flow for Gmail API."""
 
+import hashlib
 import os
 import streamlit as st
 from google.oauth2.credentials import Credentials
@@ -91,6 +92,8 @@ def init_auth_state():
         st.session_state.auth_flow = None
     if "user_email" not in st.session_state:
         st.session_state.user_email = None
+    if "token_hash" not in st.session_state:
+        st.session_state.token_hash = None
 
 
 def is_authenticated() -> bool:
@@ -117,22 +120,58 @@ def is_authenticated() -> bool:
     return False
 
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_profile_email(token_hash: str, _service) -> str | None:
+    """
+    Fetch the profile email address, cached per access token.
+    
+    Args:
+        token_hash: SHA-256 of the access token (cache key)
+        _service: Gmail API service object (excluded from the cache key)
+        
+    Returns:
+        Email address or None
+    """
+    profile = _service.users().getProfile(userId="me").execute()
+    return profile.get("emailAddress")
+
+
 def get_user_email() -> str | None:
     """Get the authenticated user's email address."""
     if st.session_state.gmail_service is None:
         return None
     
+    if st.session_state.token_hash is None:
+        token = st.session_state.credentials.token or ""
+        st.session_state.token_hash = hashlib.sha256(token.encode()).hexdigest()
+    
     try:
-        profile = st.session_state.gmail_service.users().getProfile(userId="me").execute()
-        return profile.get("emailAddress")
+        return _cached_profile_email(
+            st.session_state.token_hash,
+            st.session_state.gmail_service,
+        )
     except Exception:
         return None
 
 
+def get_user_cache_key() -> str | None:
+    """
+    Get the key that scopes per-user cached data to this user.
+    
+    Falls back to the access token hash when the profile email could not
+    be fetched, so sessions never share cached mailbox data.
+    
+    Returns:
+        The user's email, the token hash, or None if not authenticated
+    """
+    return st.session_state.user_email or st.session_state.token_hash
+
+
 def logout():
     """Clear authentication state."""
     st.session_state.credentials = None
     st.session_state.gmail_service = None
     st.session_state.auth_flow = None
     st.session_state.user_email = None
+    st.session_state.token_hash = None
 
@@ -2,7 +2,23 @@
 
 import streamlit as st
 
-from utils.logger import ActionLogger, ActionType
+from utils.logger import STATUS_EMOJI, ActionLogger, ActionType
+
+# Entry styling, looked up per entry when rendering the log
+_STATUS_COLORS = {
+    "success": "#28a745",
+    "warning": "#ffc107",
+    "error": "#dc3545",
+}
+
+_TYPE_COLORS = {
+    ActionType.AUTH_LOGIN.value: "#17a2b8",
+    ActionType.AUTH_LOGOUT.value: "#6c757d",
+    ActionType.FETCH_EMAILS.value: "#007bff",
+    ActionType.EMAILS_DELETED.value: "#dc3545",
+    ActionType.AI_ANALYSIS.value: "#20c997",
+    ActionType.ERROR.value: "#dc3545",
+}
 
 
 def render_action_log(max_entries: int = 50):
@@ -36,9 +52,16 @@ def render_action_log(max_entries: int = 50):
     
     st.divider()
     
-    # Log entries
-    for entry in logs:
-        render_log_entry(entry)
+    # Log entries, sent to the frontend as one element
+    st.markdown("".join(build_log_entry_html(entry) for entry in logs), unsafe_allow_html=True)
+    
+    # Details for entries that have them, grouped under one expander
+    entries_with_details = [entry for entry in logs if entry.get("details")]
+    if entries_with_details:
+        with st.expander("Details", expanded=False):
+            for entry in entries_with_details:
+                st.caption(ActionLogger.format_log_entry(entry))
+                st.text("\n".join(f"{key}: {value}" for key, value in entry["details"].items()))
     
     # Clear button
     st.divider()
@@ -47,85 +70,51 @@ def render_action_log(max_entries: int = 50):
         st.rerun()
 
 
-def render_log_entry(entry: dict):
+def build_log_entry_html(entry: dict) -> str:
     """
-    Render a single log entry.
+    Build the HTML for a single log entry.
     
     Args:
         entry: Log entry dictionary
+        
+    Returns:
+        HTML string for the entry
     """
-    from datetime import datetime
-    
-    # Parse timestamp
-    try:
-        timestamp = datetime.fromisoformat(entry["timestamp"])
-        time_str = timestamp.strftime("%H:%M:%S")
-    except Exception:
-        time_str = "??:??:??"
+    time_str = entry.get("ts_hms", "??:??:??")
     
     # Status styling
     status = entry.get("status", "success")
-    status_colors = {
-        "success": "#28a745",
-        "warning": "#ffc107",
-        "error": "#dc3545",
-    }
-    status_icons = {
-        "success": "✅",
-        "warning": "⚠️",
-        "error": "❌",
-    }
-    
-    color = status_colors.get(status, "#6c757d")
-    icon = status_icons.get(status, "ℹ️")
+    color = _STATUS_COLORS.get(status, "#6c757d")
+    icon = STATUS_EMOJI.get(status, "ℹ️")
     
     # Action type badge
     action_type = entry.get("type", "unknown")
-    type_colors = {
-        ActionType.AUTH_LOGIN.value: "#17a2b8",
-        ActionType.AUTH_LOGOUT.value: "#6c757d",
-        ActionType.FETCH_EMAILS.value: "#007bff",
-        ActionType.EMAILS_DELETED.value: "#dc3545",
-        ActionType.AI_ANALYSIS.value: "#20c997",
-        ActionType.ERROR.value: "#dc3545",
-    }
-    type_color = type_colors.get(action_type, "#6c757d")
-    
-    # Render
-    st.markdown(
-        f"""
-        <div style="
-            display: flex;
-            align-items: center;
-            padding: 8px 12px;
-            margin-bottom: 4px;
-            background: #1a1a2e;
-            border-radius: 6px;
-            border-left: 3px solid {color};
-        ">
-            <span style="color: #888; font-size: 0.8em; min-width: 70px;">{time_str}</span>
-            <span style="margin-left: 8px;">{icon}</span>
-            <span style="
-                background: {type_color};
-                color: white;
-                padding: 2px 8px;
-                border-radius: 4px;
-                font-size: 0.75em;
-                margin-left: 8px;
-                text-transform: uppercase;
-            ">{action_type.replace('_', ' ')}</span>
-            <span style="margin-left: 12px; color: #ddd;">{entry.get('description', '')}</span>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
-    
-    # Show details in expander if available
-    details = entry.get("details", {})
-    if details and len(details) > 0:
-        with st.expander("Details", expanded=False):
-            for key, value in details.items():
-                st.text(f"{key}: {value}")
+    type_color = _TYPE_COLORS.get(action_type, "#6c757d")
+    
+    return f"""
+<div style="
+    display: flex;
+    align-items: center;
+    padding: 8px 12px;
+    margin-bottom: 4px;
+    background: #1a1a2e;
+    border-radius: 6px;
+    border-left: 3px solid {color};
+">
+    <span style="color: #888; font-size: 0.8em; min-width: 70px;">{time_str}</span>
+    <span style="margin-left: 8px;">{icon}</span>
+    <span style="
+        background: {type_color};
+        color: white;
+        padding: 2px 8px;
+        border-radius: 4px;
+        font-size: 0.75em;
+        margin-left: 8px;
+        text-transform: uppercase;
+    ">{action_type.replace('_', ' ')}</span>
+    <span style="margin-left: 12px; color: #ddd;">{entry.get('description', '')}</span>
+</div>
+"""
 
 
 def render_compact_log(max_entries: int = 5):
@@ -1,146 +1,245 @@
 """Email list component with selection and display."""
 
+import math
+from string import Template
+
 import pandas as pd
 import streamlit as st
 
+from config import EMAILS_PER_PAGE
 from services.ai_service import analyze_email_for_importance
+from services.gmail_service import top_senders
+
+
+_EMAIL_CARD_TEMPLATE = Template("""
+<div style="
+    background: $bg_color;
+    border: 1px solid $border_color;
+    border-radius: 8px;
+    padding: 12px;
+    margin-bottom: 8px;
+">
+    <div style="display: flex; justify-content: space-between; align-items: center;">
+        <span style="font-weight: bold; color: #fff;">$sender</span>
+        <span style="color: #888; font-size: 0.85em;">$date (${age_days}d ago)</span>
+    </div>
+    <div style="margin-top: 4px;">
+        <span style="color: #ddd;">$subject</span>
+        $badge
+    </div>
+    <div style="color: #888; font-size: 0.85em; margin-top: 4px;">
+        $snippet...
+    </div>
+</div>
+""")
 
 
 def init_selection_state():
     """Initialize email selection state."""
     if "selected_emails" not in st.session_state:
         st.session_state.selected_emails = set()
+    if "selection_version" not in st.session_state:
+        st.session_state.selection_version = 0
+
+
+def set_selected_emails(email_ids):
+    """
+    Replace the current email selection.
+    
+    Bumps the selection version so the selection editor is rebuilt from
+    the new selection instead of re-applying edits made against the old one.
+    
+    Args:
+        email_ids: Iterable of email IDs to select
+    """
+    init_selection_state()
+    st.session_state.selected_emails = set(email_ids)
+    st.session_state.selection_version += 1
+
+
+def add_display_fields(emails: list[dict]):
+    """
+    Precompute truncated display strings on each email, in place.
+    
+    The values never change for a fetched email, so computing them once
+    per fetch keeps the truncation out of every rerun.
+    
+    Args:
+        emails: List of email dictionaries
+    """
+    for email in emails:
+        sender = email.get("from", "Unknown")
+        subject = email.get("subject", "(No Subject)")
+        email["display_from"] = sender[:50] + "..." if len(sender) > 50 else sender
+        email["display_subject"] = subject[:70] + "..." if len(subject) > 70 else subject
+        email["display_snippet"] = email.get("snippet", "")[:100]
 
 
-def render_email_table(emails: list[dict], sender_stats: dict[str, int]) -> list[str]:
+def render_email_table(emails: list[dict], sender_stats: dict[str, int]) -> tuple[list[str], bool]:
     """
-    Render the email table with selection checkboxes.
+    Render the email table with a selection column.
+    
+    Delete is a submit button of the selection form, so the ticks in the
+    editor are applied before the selection is returned for deletion.
     
     Args:
         emails: List of email dictionaries
         sender_stats: Sender statistics for context
         
     Returns:
-        List of selected email IDs
+        Tuple of (selected email IDs, whether Delete was clicked)
     """
     init_selection_state()
     
     if not emails:
         st.info("No emails found matching your filters.")
-        return []
-    
-    # Create DataFrame for display
-    df = pd.DataFrame(emails)
-    
-    # Add importance indicators
-    df["indicators"] = df.apply(
-        lambda row: get_importance_badge(row.to_dict()),
-        axis=1
-    )
-    
-    # Prepare display columns
-    display_df = df[["from", "subject", "date", "age_days", "indicators"]].copy()
-    display_df.columns = ["From", "Subject", "Date", "Age (days)", "Type"]
-    
-    # Truncate long values
-    display_df["From"] = display_df["From"].apply(lambda x: x[:40] + "..." if len(str(x)) > 40 else x)
-    display_df["Subject"] = display_df["Subject"].apply(lambda x: x[:50] + "..." if len(str(x)) > 50 else x)
+        return [], False
     
     # Selection header
     col1, col2, col3 = st.columns([1, 1, 2])
     
     with col1:
         if st.button("Select All", key="select_all_btn"):
-            st.session_state.selected_emails = {e["id"] for e in emails}
+            set_selected_emails(e["id"] for e in emails)
             st.rerun()
     
     with col2:
         if st.button("Clear Selection", key="clear_selection_btn"):
-            st.session_state.selected_emails = set()
+            set_selected_emails(())
             st.rerun()
     
-    with col3:
-        st.write(f"**{len(st.session_state.selected_emails)}** of {len(emails)} selected")
+    # Filled in once the editor has applied this rerun's changes
+    selection_count = col3.empty()
     
     st.divider()
     
-    # Render emails with checkboxes
-    for idx, email in enumerate(emails):
-        email_id = email["id"]
-        is_selected = email_id in st.session_state.selected_emails
-        
-        col1, col2 = st.columns([0.05, 0.95])
-        
-        with col1:
-            if st.checkbox(
-                "",
-                value=is_selected,
-                key=f"email_cb_{email_id}",
-                label_visibility="collapsed",
-            ):
-                st.session_state.selected_emails.add(email_id)
-            else:
-                st.session_state.selected_emails.discard(email_id)
-        
-        with col2:
-            render_email_card(email, is_selected)
+    # Paginate so only the current page of rows and cards is rendered
+    max_page = max(1, math.ceil(len(emails) / EMAILS_PER_PAGE))
+    page = min(max(st.session_state.get("email_page", 1), 1), max_page)
+    st.session_state.email_page = page
+    start = (page - 1) * EMAILS_PER_PAGE
+    visible = emails[start:start + EMAILS_PER_PAGE]
+    badges = [get_importance_badge(e) for e in visible]
+    
+    # The editor's data must stay fixed while the user edits it, so the
+    # Select column is built from a snapshot taken whenever the page or
+    # the selection version changes
+    editor_key = f"email_editor_{st.session_state.selection_version}_{page}"
+    if st.session_state.get("email_editor_key") != editor_key:
+        st.session_state.email_editor_key = editor_key
+        st.session_state.email_editor_base = frozenset(st.session_state.selected_emails)
+    base = st.session_state.email_editor_base
+    
+    df = pd.DataFrame([
+        {
+            "Select": e["id"] in base,
+            "From": e["display_from"],
+            "Subject": e["display_subject"],
+            "Date": e["date"],
+            "Age (days)": e["age_days"],
+            "_id": e["id"],
+        }
+        for e in visible
+    ])
+    
+    # Inside a form, toggling rows does not rerun the script; all changes
+    # are applied together when the form is submitted. Page navigation
+    # submits the form too, so ticks are never lost by changing page
+    with st.form("select_emails", clear_on_submit=False):
+        edited = st.data_editor(
+            df,
+            key=editor_key,
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Select": st.column_config.CheckboxColumn("Select"),
+                "_id": None,
+            },
+            disabled=["From", "Subject", "Date", "Age (days)"],
+        )
+        col1, col2, col3, col4 = st.columns(4)
+        prev_clicked = col1.form_submit_button(
+            "◀ Previous",
+            disabled=page <= 1,
+            use_container_width=True,
+        )
+        next_clicked = col2.form_submit_button(
+            "Next ▶",
+            disabled=page >= max_page,
+            use_container_width=True,
+        )
+        col3.form_submit_button("Apply selection", use_container_width=True)
+        delete_clicked = col4.form_submit_button(
+            "🗑️ Delete selected",
+            type="primary",
+            use_container_width=True,
+        )
+    
+    page_ids = set(df["_id"])
+    checked_ids = set(edited.loc[edited["Select"], "_id"])
+    st.session_state.selected_emails = (st.session_state.selected_emails - page_ids) | checked_ids
+    
+    # Change page only after this page's ticks have been applied
+    if prev_clicked or next_clicked:
+        st.session_state.email_page = page - 1 if prev_clicked else page + 1
+        st.rerun()
+    
+    selection_count.write(f"**{len(st.session_state.selected_emails)}** of {len(emails)} selected")
+    
+    # Email cards for the current page, sent to the frontend as one element
+    cards_html = "".join(
+        build_email_card_html(email, email["id"] in st.session_state.selected_emails, badge)
+        for email, badge in zip(visible, badges)
+    )
+    st.markdown(cards_html, unsafe_allow_html=True)
+    
+    st.caption(
+        f"Showing emails {start + 1}–{start + len(visible)} of {len(emails)} "
+        f"(page {page} of {max_page})"
+    )
+    
+    return list(st.session_state.selected_emails), delete_clicked
+
+
+def build_email_card_html(email: dict, is_selected: bool = False, badge: str | None = None) -> str:
+    """
+    Build the HTML for a single email card.
+    
+    Args:
+        email: Email dictionary with display fields (see add_display_fields)
+        is_selected: Whether email is selected
+        badge: Precomputed importance badge HTML (computed if omitted)
         
-        # Show first 50 emails, then offer to load more
-        if idx >= 49:
-            remaining = len(emails) - 50
-            if remaining > 0:
-                st.info(f"Showing first 50 emails. {remaining} more available.")
-            break
+    Returns:
+        HTML string for the card
+    """
+    # Get importance badge
+    if badge is None:
+        badge = get_importance_badge(email)
     
-    return list(st.session_state.selected_emails)
+    return _EMAIL_CARD_TEMPLATE.substitute(
+        # Style based on selection
+        bg_color="#1e3a5f" if is_selected else "#0e1117",
+        border_color="#4a9eff" if is_selected else "#333",
+        sender=email["display_from"],
+        date=email.get("date", ""),
+        age_days=email.get("age_days", 0),
+        subject=email["display_subject"],
+        badge=badge,
+        snippet=email["display_snippet"],
+    )
 
 
-def render_email_card(email: dict, is_selected: bool = False):
+def render_email_card(email: dict, is_selected: bool = False, badge: str | None = None):
     """
     Render a single email as a card.
     
     Args:
         email: Email dictionary
         is_selected: Whether email is selected
+        badge: Precomputed importance badge HTML (computed if omitted)
     """
-    # Get importance badge
-    badge = get_importance_badge(email)
-    
-    # Style based on selection
-    bg_color = "#1e3a5f" if is_selected else "#0e1117"
-    border_color = "#4a9eff" if is_selected else "#333"
-    
-    # Truncate values
-    sender = email.get("from", "Unknown")
-    sender_display = sender[:50] + "..." if len(sender) > 50 else sender
-    subject = email.get("subject", "(No Subject)")
-    subject_display = subject[:70] + "..." if len(subject) > 70 else subject
-    snippet = email.get("snippet", "")[:100]
-    
-    st.markdown(
-        f"""
-        <div style="
-            background: {bg_color};
-            border: 1px solid {border_color};
-            border-radius: 8px;
-            padding: 12px;
-            margin-bottom: 8px;
-        ">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <span style="font-weight: bold; color: #fff;">{sender_display}</span>
-                <span style="color: #888; font-size: 0.85em;">{email.get("date", "")} ({email.get("age_days", 0)}d ago)</span>
-            </div>
-            <div style="margin-top: 4px;">
-                <span style="color: #ddd;">{subject_display}</span>
-                {badge}
-            </div>
-            <div style="color: #888; font-size: 0.85em; margin-top: 4px;">
-                {snippet}...
-            </div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(build_email_card_html(email, is_selected, badge), unsafe_allow_html=True)
 
 
 def get_importance_badge(email: dict) -> str:
@@ -186,25 +285,16 @@ def render_sender_breakdown(sender_stats: dict[str, int], on_select_sender: call
         st.info("No sender data available.")
         return
     
-    # Create DataFrame
-    df = pd.DataFrame([
-        {"Sender": sender, "Count": count}
-        for sender, count in sender_stats.items()
-    ])
-    
     # Show top 20
-    df_display = df.head(20)
-    
-    for _, row in df_display.iterrows():
+    for sender, count in top_senders(sender_stats, 20):
         col1, col2, col3 = st.columns([3, 1, 1])
         
         with col1:
-            sender = row["Sender"]
             display_sender = sender[:40] + "..." if len(sender) > 40 else sender
             st.text(display_sender)
         
         with col2:
-            st.text(f"{row['Count']} emails")
+            st.text(f"{count} emails")
         
         with col3:
             if st.button("Select All", key=f"select_sender_{sender[:20]}"):
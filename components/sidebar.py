@@ -3,62 +3,76 @@
 import streamlit as st
 
 from config import DEFAULT_DAYS_OLD
+from services.gmail_service import top_senders
 
+# System labels that don't work with label: syntax
+_SYSTEM_LABELS = frozenset({
+    "UNREAD", "INBOX", "SENT", "DRAFT", "SPAM", "TRASH", "STARRED",
+    "IMPORTANT", "CHAT", "CATEGORY_PERSONAL", "CATEGORY_SOCIAL",
+    "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES", "CATEGORY_FORUMS",
+})
 
-def render_sidebar_filters(labels: list[dict] | None = None) -> dict:
+
+def render_sidebar_filters(labels: list[dict] | None = None) -> tuple[dict, bool, bool]:
     """
     Render the sidebar with filter controls.
     
+    The fetch buttons submit the filter form, so a fetch always uses the
+    values currently entered.
+    
     Args:
         labels: Optional list of Gmail labels
         
     Returns:
-        Dictionary with current filter values
+        Tuple of (filter values, fetch submitted, reload submitted)
     """
     st.sidebar.header("📋 Filters")
     
-    # Days old filter
-    days_old = st.sidebar.slider(
-        "Minimum age (days)",
-        min_value=1,
-        max_value=365,
-        value=DEFAULT_DAYS_OLD,
-        help="Only show emails older than this many days",
-    )
-    
-    # Unread only toggle
-    unread_only = st.sidebar.checkbox(
-        "Unread only",
-        value=True,
-        help="Only show unread emails",
-    )
-    
-    # Sender filter
-    sender_filter = st.sidebar.text_input(
-        "Filter by sender",
-        placeholder="e.g., newsletter@example.com",
-        help="Filter emails from a specific sender",
-    )
-    
-    # Subject filter
-    subject_filter = st.sidebar.text_input(
-        "Filter by subject",
-        placeholder="e.g., weekly digest",
-        help="Filter emails containing keywords in subject",
-    )
-    
-    # Label filter - exclude system labels that don't work with label: syntax
-    system_labels = {"UNREAD", "INBOX", "SENT", "DRAFT", "SPAM", "TRASH", "STARRED", 
-                     "IMPORTANT", "CHAT", "CATEGORY_PERSONAL", "CATEGORY_SOCIAL",
-                     "CATEGORY_PROMOTIONS", "CATEGORY_UPDATES", "CATEGORY_FORUMS"}
-    user_labels = [l["name"] for l in (labels or []) if l["name"] not in system_labels]
-    label_options = ["All"] + user_labels
-    label_filter = st.sidebar.selectbox(
-        "Filter by label",
-        options=label_options,
-        index=0,
-        help="Filter by custom Gmail labels (system labels are excluded)",
-    )
+    # Widgets inside a form only rerun the script when the form is
+    # submitted, not on every keystroke or slider tick
+    with st.sidebar.form("filter_form"):
+        # Days old filter
+        days_old = st.slider(
+            "Minimum age (days)",
+            min_value=1,
+            max_value=365,
+            value=DEFAULT_DAYS_OLD,
+            help="Only show emails older than this many days",
+        )
+        
+        # Unread only toggle
+        unread_only = st.checkbox(
+            "Unread only",
+            value=True,
+            help="Only show unread emails",
+        )
+        
+        # Sender filter
+        sender_filter = st.text_input(
+            "Filter by sender",
+            placeholder="e.g., newsletter@example.com",
+            help="Filter emails from a specific sender",
+        )
+        
+        # Subject filter
+        subject_filter = st.text_input(
+            "Filter by subject",
+            placeholder="e.g., weekly digest",
+            help="Filter emails containing keywords in subject",
+        )
+        
+        # Label filter - exclude system labels that don't work with label: syntax
+        user_labels = [l["name"] for l in (labels or []) if l["name"] not in _SYSTEM_LABELS]
+        label_options = ["All"] + user_labels
+        label_filter = st.selectbox(
+            "Filter by label",
+            options=label_options,
+            index=0,
+            help="Filter by custom Gmail labels (system labels are excluded)",
+        )
+        
+        submitted = st.form_submit_button("🔍 Fetch Emails", type="primary", use_container_width=True)
+        reload = st.form_submit_button("🔄 Reload from Gmail", use_container_width=True)
     
     st.sidebar.divider()
     
@@ -108,7 +122,7 @@ def render_sidebar_filters(labels: list[dict] | None = None) -> dict:
         "label_filter": label_filter if label_filter != "All" else None,
     }
     
-    return filters
+    return filters, submitted, reload
 
 
 def render_sidebar_stats(emails: list[dict], sender_stats: dict[str, int]):
@@ -124,20 +138,19 @@ def render_sidebar_stats(emails: list[dict], sender_stats: dict[str, int]):
     
     col1, col2 = st.sidebar.columns(2)
     
-    with col1:
-        st.sidebar.metric("Total Emails", len(emails))
-    
-    with col2:
-        st.sidebar.metric("Unique Senders", len(sender_stats))
+    col1.metric("Total Emails", len(emails))
+    col2.metric("Unique Senders", len(sender_stats))
     
-    # Top senders
+    # Top senders, rendered as a single markdown element
     if sender_stats:
         st.sidebar.subheader("Top Senders")
-        top_5 = list(sender_stats.items())[:5]
+        top_5 = top_senders(sender_stats, 5)
+        lines = []
         for sender, count in top_5:
             # Truncate long sender names
             display_sender = sender[:25] + "..." if len(sender) > 25 else sender
-            st.sidebar.text(f"{display_sender}: {count}")
+            lines.append(f"- `{display_sender}`: **{count}**")
+        st.sidebar.markdown("\n".join(lines))
 
 
 
@@ -8,6 +8,10 @@ load_dotenv()
 # OpenAI Configuration
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 OPENAI_MODEL = "gpt-4o-mini"
+AI_SUMMARY_MIN_EMAILS = 20  # Smaller fetches get the basic summary without an AI call
+AI_SUMMARY_MIN_SENDERS = 3
+AI_CACHE_MAX_ENTRIES = 256  # In-memory AI results kept per cached function
+AI_CACHE_EXPIRE_SECONDS = 86400  # AI results are recomputed after a day
 
 # Google OAuth Configuration
 GOOGLE_CREDENTIALS_PATH = os.getenv("GOOGLE_CREDENTIALS_PATH", "credentials.json")
@@ -20,6 +24,19 @@ GMAIL_SCOPES = [
 # Email Filter Defaults
 DEFAULT_DAYS_OLD = 30
 MAX_EMAILS_PER_FETCH = 500
+EMAILS_PER_PAGE = 10
+
+# Gmail API Batching
+GMAIL_BATCH_SIZE = 50  # Requests per batch HTTP call (Gmail recommends <= 50)
+GMAIL_MAX_CONCURRENT_BATCHES = 4  # Batches in flight at once per mailbox
+GMAIL_MODIFY_BATCH_SIZE = 1000  # Maximum ids per batchModify call
+GMAIL_NUM_RETRIES = 3  # Retries with exponential backoff for failed batch parts
+
+# Recommendations
+HIGH_VOLUME_THRESHOLD = 10  # Emails from one sender to flag it as high-volume
+
+# Action Log
+ACTION_LOG_MAX_ENTRIES = 1000  # Oldest entries are dropped beyond this
 
 # App Configuration
 APP_TITLE = "Gmail Cleanup Agent"
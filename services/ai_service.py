@@ -1,18 +1,53 @@
 """AI service for email analysis and recommendations using OpenAI."""
 
+import functools
 import json
+import re
 from typing import Any
 
+import streamlit as st
 from openai import OpenAI
 
-from config import OPENAI_API_KEY, OPENAI_MODEL
+from config import (
+    AI_CACHE_EXPIRE_SECONDS,
+    AI_CACHE_MAX_ENTRIES,
+    AI_SUMMARY_MIN_EMAILS,
+    AI_SUMMARY_MIN_SENDERS,
+    HIGH_VOLUME_THRESHOLD,
+    OPENAI_API_KEY,
+    OPENAI_MODEL,
+)
+from services.gmail_service import top_senders
+
+# Keywords for analyze_email_for_importance (plain substring matches)
+_AUTOMATED_KEYWORDS = ("noreply", "no-reply", "donotreply", "notification")
+_NEWSLETTER_KEYWORDS = ("newsletter", "digest", "weekly", "monthly", "unsubscribe")
+_PROMOTIONAL_KEYWORDS = ("sale", "off", "deal", "discount", "offer", "free")
+_IMPORTANT_KEYWORDS = ("invoice", "receipt", "confirm", "action required")
+
+
+def _keyword_pattern(keywords: tuple[str, ...]) -> re.Pattern:
+    """Compile keywords into one alternation matching any of them."""
+    return re.compile("|".join(map(re.escape, keywords)))
+
+
+_AUTOMATED_RE = _keyword_pattern(_AUTOMATED_KEYWORDS)
+_NEWSLETTER_RE = _keyword_pattern(_NEWSLETTER_KEYWORDS)
+_PROMOTIONAL_RE = _keyword_pattern(_PROMOTIONAL_KEYWORDS)
+_IMPORTANT_RE = _keyword_pattern(_IMPORTANT_KEYWORDS)
 
 
 def get_openai_client() -> OpenAI | None:
     """Get OpenAI client if API key is configured."""
     if not OPENAI_API_KEY:
         return None
-    return OpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client(OPENAI_API_KEY)
+
+
+@st.cache_resource(show_spinner=False)
+def _openai_client(api_key: str) -> OpenAI:
+    """Build one shared OpenAI client so its connection pool is reused across reruns."""
+    return OpenAI(api_key=api_key)
 
 
 def categorize_senders(sender_stats: dict[str, int]) -> dict[str, list[str]]:
@@ -30,12 +65,33 @@ def categorize_senders(sender_stats: dict[str, int]) -> dict[str, list[str]]:
         return {"uncategorized": list(sender_stats.keys())}
     
     # Take top 50 senders for analysis
-    top_senders = list(sender_stats.keys())[:50]
+    senders = [sender for sender, _ in top_senders(sender_stats, 50)]
+    
+    try:
+        return _categorize_top_senders(tuple(senders))
+    except Exception as e:
+        return {"uncategorized": senders}
+
+
+@st.cache_data(ttl=AI_CACHE_EXPIRE_SECONDS, max_entries=AI_CACHE_MAX_ENTRIES, show_spinner=False)
+def _categorize_top_senders(top_senders: tuple[str, ...]) -> dict[str, list[str]]:
+    """
+    Ask the model to categorize senders, cached in memory across sessions.
+    
+    Errors are raised rather than handled so failed calls are not cached.
+    
+    Args:
+        top_senders: Sender emails to categorize
+        
+    Returns:
+        Dictionary with categories as keys and list of senders as values
+    """
+    client = get_openai_client()
     
     prompt = f"""Analyze these email senders and categorize them into groups.
     
 Senders:
-{json.dumps(top_senders, indent=2)}
+{json.dumps(list(top_senders), indent=2)}
 
 Categorize into these groups:
 - newsletter: Regular newsletters and subscriptions
@@ -47,19 +103,14 @@ Categorize into these groups:
 Return a JSON object with category names as keys and arrays of sender emails as values.
 Only include senders in one category. Return ONLY valid JSON, no other text."""
 
-    try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            response_format={"type": "json_object"},
-        )
-        
-        result = json.loads(response.choices[0].message.content)
-        return result
-        
-    except Exception as e:
-        return {"uncategorized": top_senders}
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        response_format={"type": "json_object"},
+    )
+    
+    return json.loads(response.choices[0].message.content)
 
 
 def generate_deletion_summary(emails: list[dict], sender_stats: dict[str, int]) -> str:
@@ -73,15 +124,40 @@ def generate_deletion_summary(emails: list[dict], sender_stats: dict[str, int])
     Returns:
         Summary string
     """
+    # Small or single-source fetches are described well enough without AI
+    if len(emails) < AI_SUMMARY_MIN_EMAILS or len(sender_stats) < AI_SUMMARY_MIN_SENDERS:
+        return basic_summary(emails, sender_stats)
+    
     client = get_openai_client()
     
     if not client:
         # Fallback to basic summary
-        return _basic_summary(emails, sender_stats)
+        return basic_summary(emails, sender_stats)
     
     # Prepare data for AI
-    top_senders = list(sender_stats.items())[:10]
-    total_emails = len(emails)
+    top_10 = tuple(top_senders(sender_stats, 10))
+    
+    try:
+        return _summarize_top_senders(len(emails), top_10)
+    except Exception:
+        return basic_summary(emails, sender_stats)
+
+
+@st.cache_data(ttl=AI_CACHE_EXPIRE_SECONDS, max_entries=AI_CACHE_MAX_ENTRIES, show_spinner=False)
+def _summarize_top_senders(total_emails: int, top_senders: tuple[tuple[str, int], ...]) -> str:
+    """
+    Ask the model for a deletion summary, cached in memory across sessions.
+    
+    Errors are raised rather than handled so failed calls are not cached.
+    
+    Args:
+        total_emails: Number of emails to be deleted
+        top_senders: (sender, count) pairs for the top senders
+        
+    Returns:
+        Summary string
+    """
+    client = get_openai_client()
     
     prompt = f"""Create a brief, friendly summary of emails about to be deleted.
 
@@ -96,26 +172,21 @@ Write 2-3 sentences summarizing:
 
 Keep it concise and helpful."""
 
-    try:
-        response = client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=200,
-        )
-        
-        return response.choices[0].message.content.strip()
-        
-    except Exception:
-        return _basic_summary(emails, sender_stats)
+    response = client.chat.completions.create(
+        model=OPENAI_MODEL,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.7,
+        max_tokens=200,
+    )
+    
+    return response.choices[0].message.content.strip()
 
 
-def _basic_summary(emails: list[dict], sender_stats: dict[str, int]) -> str:
+def basic_summary(emails: list[dict], sender_stats: dict[str, int]) -> str:
     """Generate a basic summary without AI."""
     total = len(emails)
     unique_senders = len(sender_stats)
-    top_sender = list(sender_stats.keys())[0] if sender_stats else "Unknown"
-    top_count = list(sender_stats.values())[0] if sender_stats else 0
+    top_sender, top_count = top_senders(sender_stats, 1)[0] if sender_stats else ("Unknown", 0)
     
     return (
         f"Ready to delete {total} unread emails from {unique_senders} senders. "
@@ -142,18 +213,17 @@ def get_smart_recommendations(
     recommendations = []
     
     # Find high-volume senders
-    high_volume_threshold = 10
-    high_volume_senders = [
-        sender for sender, count in sender_stats.items()
-        if count >= high_volume_threshold
-    ]
+    high_volume_senders = {
+        sender: count for sender, count in sender_stats.items()
+        if count >= HIGH_VOLUME_THRESHOLD
+    }
     
     if high_volume_senders:
         recommendations.append({
             "type": "bulk_delete",
             "title": "High-Volume Senders",
-            "description": f"Found {len(high_volume_senders)} senders with 10+ unread emails each.",
-            "senders": high_volume_senders[:5],
+            "description": f"Found {len(high_volume_senders)} senders with {HIGH_VOLUME_THRESHOLD}+ unread emails each.",
+            "senders": [sender for sender, _ in top_senders(high_volume_senders, 5)],
             "action": "Consider deleting all emails from these senders",
             "priority": "high",
         })
@@ -162,10 +232,8 @@ def get_smart_recommendations(
     if categories:
         for category, senders in categories.items():
             if category in ["newsletter", "promotional"] and senders:
-                category_emails = sum(
-                    sender_stats.get(s, 0) for s in senders
-                    if s in sender_stats
-                )
+                matched = set(senders).intersection(sender_stats)
+                category_emails = sum(sender_stats[s] for s in matched)
                 if category_emails > 0:
                     recommendations.append({
                         "type": "category_delete",
@@ -200,15 +268,23 @@ def analyze_email_for_importance(email: dict) -> dict[str, Any]:
     Returns:
         Analysis dictionary
     """
-    sender = email.get("from", "").lower()
-    subject = email.get("subject", "").lower()
+    # The heuristics only depend on sender and subject, so reruns reuse
+    # the cached result for emails that were already analyzed
+    return dict(_analyze_sender_subject(email["from_addr"], email.get("subject", "")))
+
+
+@functools.lru_cache(maxsize=4096)
+def _analyze_sender_subject(sender: str, subject: str) -> dict[str, bool]:
+    """Compute importance signals for a sender/subject pair."""
+    sender = sender.lower()
+    subject = subject.lower()
     
     # Simple heuristics (can be enhanced with AI)
     importance_signals = {
-        "likely_automated": any(x in sender for x in ["noreply", "no-reply", "donotreply", "notification"]),
-        "likely_newsletter": any(x in subject for x in ["newsletter", "digest", "weekly", "monthly", "unsubscribe"]),
-        "likely_promotional": any(x in subject for x in ["sale", "off", "deal", "discount", "offer", "free"]),
-        "potentially_important": any(x in subject for x in ["invoice", "receipt", "confirm", "action required"]),
+        "likely_automated": bool(_AUTOMATED_RE.search(sender)),
+        "likely_newsletter": bool(_NEWSLETTER_RE.search(subject)),
+        "likely_promotional": bool(_PROMOTIONAL_RE.search(subject)),
+        "potentially_important": bool(_IMPORTANT_RE.search(subject)),
     }
     
     return importance_signals
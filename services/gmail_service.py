@@ -1,12 +1,44 @@
 """Gmail API service for fetching and managing emails."""
 
-from datetime import datetime
+import functools
+import heapq
+import operator
+import re
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
 from typing import Any
 
 import streamlit as st
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.http import build_http
 
-from config import DEFAULT_DAYS_OLD, MAX_EMAILS_PER_FETCH
+from config import (
+    DEFAULT_DAYS_OLD,
+    GMAIL_BATCH_SIZE,
+    GMAIL_MAX_CONCURRENT_BATCHES,
+    GMAIL_MODIFY_BATCH_SIZE,
+    GMAIL_NUM_RETRIES,
+    MAX_EMAILS_PER_FETCH,
+)
+
+# Only the headers the UI displays are requested with format="metadata"
+_METADATA_HEADERS = ("From", "Subject", "Date")
+
+# messages.list returns at most this many ids per page
+_LIST_PAGE_SIZE = 500
+
+# Partial response: only the message fields _parse_message reads
+_METADATA_FIELDS = "id,threadId,labelIds,sizeEstimate,snippet,payload/headers"
+
+# System labels that should be skipped (handled by other filters or use special syntax)
+_SKIPPED_LABEL_FILTERS = frozenset({
+    "UNREAD", "INBOX", "SENT", "DRAFT", "SPAM", "TRASH", "STARRED", "IMPORTANT",
+})
+
+# Address part of a "Name <email>" From header
+_ANGLE_ADDRESS_RE = re.compile(r"<([^>]+)>")
 
 
 def build_search_query(
@@ -29,11 +61,20 @@ def build_search_query(
     Returns:
         Gmail search query string
     """
+    return _build_search_query(days_old, sender_filter, subject_filter, label_filter, unread_only)
+
+
+@functools.lru_cache(maxsize=64)
+def _build_search_query(
+    days_old: int,
+    sender_filter: str | None,
+    subject_filter: str | None,
+    label_filter: str | None,
+    unread_only: bool,
+) -> str:
+    """Build the query string; cached since reruns repeat the same filters."""
     query_parts = []
     
-    # System labels that should be skipped (handled by other filters or use special syntax)
-    system_labels_to_skip = {"UNREAD", "INBOX", "SENT", "DRAFT", "SPAM", "TRASH", "STARRED", "IMPORTANT"}
-    
     # Age filter
     if days_old > 0:
         query_parts.append(f"older_than:{days_old}d")
@@ -44,76 +85,173 @@ def build_search_query(
     
     # Sender filter - wrap in quotes if contains spaces
     if sender_filter:
-        if " " in sender_filter:
-            query_parts.append(f'from:"{sender_filter}"')
-        else:
-            query_parts.append(f"from:{sender_filter}")
+        query_parts.append(f"from:{_quote_if_space(sender_filter)}")
     
     # Subject filter - wrap in quotes if contains spaces
     if subject_filter:
-        if " " in subject_filter:
-            query_parts.append(f'subject:"{subject_filter}"')
-        else:
-            query_parts.append(f"subject:{subject_filter}")
+        query_parts.append(f"subject:{_quote_if_space(subject_filter)}")
     
     # Label filter - skip system labels that are handled differently
-    if label_filter and label_filter != "All" and label_filter.upper() not in system_labels_to_skip:
+    if label_filter and label_filter != "All" and label_filter.upper() not in _SKIPPED_LABEL_FILTERS:
         query_parts.append(f"label:{label_filter}")
     
     return " ".join(query_parts)
 
 
+def _quote_if_space(value: str) -> str:
+    """Wrap a search term in quotes if it contains spaces."""
+    return f'"{value}"' if " " in value else value
+
+
 def fetch_emails(
     service,
+    credentials,
     query: str,
     max_results: int = MAX_EMAILS_PER_FETCH,
+    metadata_headers: tuple[str, ...] = _METADATA_HEADERS,
+    fields: str = _METADATA_FIELDS,
 ) -> list[dict[str, Any]]:
     """
     Fetch emails matching the query.
     
     Args:
         service: Gmail API service object
+        credentials: OAuth credentials used by the worker threads' transports
         query: Gmail search query
         max_results: Maximum number of emails to fetch
+        metadata_headers: Message headers to request
+        fields: Gmail partial-response field mask for each message
         
     Returns:
         List of email dictionaries with metadata
+        
+    Raises:
+        Exception: If listing or fetching the messages fails
     """
-    emails = []
+    # Every message's age is measured against the same instant
+    now = datetime.now(timezone.utc)
     
-    try:
-        # Get message IDs matching the query
-        results = service.users().messages().list(
-            userId="me",
-            q=query,
-            maxResults=max_results,
-        ).execute()
+    # Request details in batches of GMAIL_BATCH_SIZE, with up to
+    # GMAIL_MAX_CONCURRENT_BATCHES batches in flight at once
+    def fetch_chunk(chunk: list[str]) -> list[dict[str, Any]]:
+        parsed = {}
+        failed_ids = []
         
-        messages = results.get("messages", [])
+        # Parse each message as its response arrives
+        def on_response(msg_id, response, exception):
+            if exception is None:
+                parsed[msg_id] = _parse_message(response, now)
+            else:
+                failed_ids.append(msg_id)
         
-        if not messages:
-            return []
+        batch = service.new_batch_http_request(callback=on_response)
+        for msg_id in chunk:
+            batch.add(
+                service.users().messages().get(
+                    userId="me",
+                    id=msg_id,
+                    format="metadata",
+                    metadataHeaders=list(metadata_headers),
+                    fields=fields,
+                ),
+                request_id=msg_id,
+            )
         
-        # Fetch details for each message
-        for msg in messages:
-            email_data = get_email_details(service, msg["id"])
-            if email_data:
-                emails.append(email_data)
+        # A failure of the whole batch (auth, network) propagates
+        http = _thread_http(credentials)
+        batch.execute(http=http)
         
-        return emails
+        # Retry messages whose batch part failed (e.g. rate limited) one
+        # by one, with exponential backoff
+        for msg_id in failed_ids:
+            parsed[msg_id] = get_email_details(
+                service,
+                msg_id,
+                metadata_headers=metadata_headers,
+                fields=fields,
+                http=http,
+                now=now,
+                num_retries=GMAIL_NUM_RETRIES,
+            )
         
-    except Exception as e:
-        st.error(f"Error fetching emails: {str(e)}")
-        return []
+        return [parsed[msg_id] for msg_id in chunk if parsed.get(msg_id)]
+    
+    # Page through the message IDs matching the query, submitting each
+    # page's batches as soon as it arrives so listing the next page
+    # overlaps fetching the details of this one
+    futures = []
+    with ThreadPoolExecutor(max_workers=GMAIL_MAX_CONCURRENT_BATCHES) as executor:
+        page_token = None
+        remaining = max_results
+        while remaining > 0:
+            results = service.users().messages().list(
+                userId="me",
+                q=query,
+                maxResults=min(remaining, _LIST_PAGE_SIZE),
+                pageToken=page_token,
+            ).execute()
+            
+            message_ids = [msg["id"] for msg in results.get("messages", [])]
+            futures.extend(
+                executor.submit(fetch_chunk, chunk)
+                for chunk in _chunks(message_ids, GMAIL_BATCH_SIZE)
+            )
+            
+            remaining -= len(message_ids)
+            page_token = results.get("nextPageToken")
+            if not page_token or not message_ids:
+                break
+        
+        return [email_data for future in futures for email_data in future.result()]
 
 
-def get_email_details(service, message_id: str) -> dict[str, Any] | None:
+@st.cache_data(ttl=300, show_spinner=False)
+def cached_fetch_emails(
+    user_key: str,
+    query: str,
+    max_results: int,
+    _service,
+    _credentials,
+) -> list[dict[str, Any]]:
+    """
+    Fetch emails matching a query, cached per user for five minutes.
+    
+    Errors are raised rather than handled so failed fetches are not cached.
+    
+    Args:
+        user_key: Identifies the authenticated user (cache key)
+        query: Gmail search query
+        max_results: Maximum number of emails to fetch
+        _service: Gmail API service object (excluded from the cache key)
+        _credentials: OAuth credentials (excluded from the cache key)
+        
+    Returns:
+        List of email dictionaries with metadata
+    """
+    return fetch_emails(_service, _credentials, query, max_results)
+
+
+def get_email_details(
+    service,
+    message_id: str,
+    metadata_headers: tuple[str, ...] = _METADATA_HEADERS,
+    fields: str = _METADATA_FIELDS,
+    http=None,
+    now: datetime | None = None,
+    num_retries: int = 0,
+) -> dict[str, Any] | None:
     """
     Get detailed information for a single email.
     
     Args:
         service: Gmail API service object
         message_id: The email message ID
+        metadata_headers: Message headers to request
+        fields: Gmail partial-response field mask
+        http: Optional HTTP transport to execute the request with
+        now: Current UTC time, passed in when fetching many emails
+        num_retries: Retries with exponential backoff on rate limits and
+            server errors
         
     Returns:
         Dictionary with email details or None if error
@@ -123,43 +261,90 @@ def get_email_details(service, message_id: str) -> dict[str, Any] | None:
             userId="me",
             id=message_id,
             format="metadata",
-            metadataHeaders=["From", "Subject", "Date"],
-        ).execute()
-        
-        headers = {h["name"]: h["value"] for h in message.get("payload", {}).get("headers", [])}
-        
-        # Parse date
-        date_str = headers.get("Date", "")
-        try:
-            date = parsedate_to_datetime(date_str)
-        except Exception:
-            date = datetime.now()
-        
-        # Calculate age in days
-        age_days = (datetime.now(date.tzinfo) - date).days if date.tzinfo else (datetime.now() - date).days
+            metadataHeaders=list(metadata_headers),
+            fields=fields,
+        ).execute(http=http, num_retries=num_retries)
         
-        return {
-            "id": message_id,
-            "thread_id": message.get("threadId"),
-            "from": headers.get("From", "Unknown"),
-            "subject": headers.get("Subject", "(No Subject)"),
-            "date": date.strftime("%Y-%m-%d %H:%M"),
-            "age_days": age_days,
-            "snippet": message.get("snippet", ""),
-            "labels": message.get("labelIds", []),
-            "size_estimate": message.get("sizeEstimate", 0),
-        }
+        return _parse_message(message, now)
         
     except Exception as e:
         return None
 
 
-def trash_emails(service, message_ids: list[str]) -> dict[str, Any]:
+def _parse_message(message: dict[str, Any], now: datetime | None = None) -> dict[str, Any]:
+    """
+    Convert a metadata-format Gmail message into an email dictionary.
+    
+    Args:
+        message: Message resource returned by messages.get
+        now: Current UTC time, passed in when parsing many messages
+        
+    Returns:
+        Dictionary with email details
+    """
+    now = now or datetime.now(timezone.utc)
+    headers = {h["name"]: h["value"] for h in message.get("payload", {}).get("headers", [])}
+    
+    # Parse date
+    date_str = headers.get("Date", "")
+    try:
+        date = parsedate_to_datetime(date_str)
+    except Exception:
+        date = now
+    
+    # Calculate age in days (dates without a timezone are treated as UTC)
+    date_utc = date.astimezone(timezone.utc) if date.tzinfo else date.replace(tzinfo=timezone.utc)
+    age_days = (now - date_utc).days
+    
+    # Extract the sender address once so stats and indexes are dict lookups
+    from_header = headers.get("From", "Unknown")
+    
+    return {
+        "id": message["id"],
+        "thread_id": message.get("threadId"),
+        "from": from_header,
+        "from_addr": extract_sender_address(from_header).lower(),
+        "subject": headers.get("Subject", "(No Subject)"),
+        "date": date.strftime("%Y-%m-%d %H:%M"),
+        "age_days": age_days,
+        "snippet": message.get("snippet", ""),
+        "labels": message.get("labelIds", []),
+        "size_estimate": message.get("sizeEstimate", 0),
+    }
+
+
+def _chunks(items: list, size: int) -> list[list]:
+    """Split a list into consecutive chunks of at most `size` items."""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _thread_http(credentials) -> AuthorizedHttp:
+    """
+    Build a fresh authorized HTTP transport for a worker thread.
+    
+    httplib2 is not thread-safe, so concurrent requests must not share
+    the transport the service was built with. build_http applies the
+    client library's default socket timeout.
+    
+    Args:
+        credentials: OAuth credentials to authorize requests with
+        
+    Returns:
+        Authorized HTTP transport
+    """
+    return AuthorizedHttp(credentials, http=build_http())
+
+
+def trash_emails(service, credentials, message_ids: list[str]) -> dict[str, Any]:
     """
     Move emails to trash.
     
+    Individual trash() calls are packed into batch HTTP requests, and up
+    to GMAIL_MAX_CONCURRENT_BATCHES batches are sent concurrently.
+    
     Args:
         service: Gmail API service object
+        credentials: OAuth credentials used by the worker threads' transports
         message_ids: List of message IDs to trash
         
     Returns:
@@ -171,54 +356,84 @@ def trash_emails(service, message_ids: list[str]) -> dict[str, Any]:
         "errors": [],
     }
     
-    for msg_id in message_ids:
+    def trash_chunk(chunk: list[str]) -> dict[str, Any]:
+        chunk_results = {"success": 0, "failed": 0, "errors": []}
+        
+        def on_response(msg_id, response, exception):
+            if exception is None:
+                chunk_results["success"] += 1
+            else:
+                chunk_results["failed"] += 1
+                chunk_results["errors"].append(f"Failed to trash {msg_id}: {str(exception)}")
+        
+        batch = service.new_batch_http_request(callback=on_response)
+        for msg_id in chunk:
+            batch.add(
+                service.users().messages().trash(userId="me", id=msg_id),
+                request_id=msg_id,
+            )
+        
         try:
-            service.users().messages().trash(
-                userId="me",
-                id=msg_id,
-            ).execute()
-            results["success"] += 1
+            batch.execute(http=_thread_http(credentials))
         except Exception as e:
-            results["failed"] += 1
-            results["errors"].append(f"Failed to trash {msg_id}: {str(e)}")
+            # The whole batch failed; count every message without a response
+            handled = chunk_results["success"] + chunk_results["failed"]
+            chunk_results["failed"] += len(chunk) - handled
+            chunk_results["errors"].append(f"Failed to trash batch of {len(chunk)}: {str(e)}")
+        
+        return chunk_results
+    
+    with ThreadPoolExecutor(max_workers=GMAIL_MAX_CONCURRENT_BATCHES) as executor:
+        for chunk_results in executor.map(trash_chunk, _chunks(message_ids, GMAIL_BATCH_SIZE)):
+            results["success"] += chunk_results["success"]
+            results["failed"] += chunk_results["failed"]
+            results["errors"].extend(chunk_results["errors"])
     
     return results
 
 
-def batch_trash_emails(service, message_ids: list[str]) -> dict[str, Any]:
+def batch_trash_emails(service, credentials, message_ids: list[str]) -> dict[str, Any]:
     """
     Batch move emails to trash for better performance.
     
     Args:
         service: Gmail API service object
+        credentials: OAuth credentials for the fallback trash calls
         message_ids: List of message IDs to trash
         
     Returns:
         Dictionary with results
     """
-    if not message_ids:
-        return {"success": 0, "failed": 0, "errors": []}
+    results = {
+        "success": 0,
+        "failed": 0,
+        "errors": [],
+    }
+    fallback_ids = []
     
-    try:
-        # Use batchModify for efficiency
-        service.users().messages().batchModify(
-            userId="me",
-            body={
-                "ids": message_ids,
-                "addLabelIds": ["TRASH"],
-                "removeLabelIds": ["INBOX"],
-            },
-        ).execute()
-        
-        return {
-            "success": len(message_ids),
-            "failed": 0,
-            "errors": [],
-        }
-        
-    except Exception as e:
-        # Fall back to individual trash if batch fails
-        return trash_emails(service, message_ids)
+    # Use batchModify for efficiency, one call per GMAIL_MODIFY_BATCH_SIZE ids
+    for chunk in _chunks(message_ids, GMAIL_MODIFY_BATCH_SIZE):
+        try:
+            service.users().messages().batchModify(
+                userId="me",
+                body={
+                    "ids": chunk,
+                    "addLabelIds": ["TRASH"],
+                    "removeLabelIds": ["INBOX"],
+                },
+            ).execute()
+            results["success"] += len(chunk)
+        except Exception:
+            fallback_ids.extend(chunk)
+    
+    # Fall back to individual trash calls only for chunks that failed
+    if fallback_ids:
+        fallback = trash_emails(service, credentials, fallback_ids)
+        results["success"] += fallback["success"]
+        results["failed"] += fallback["failed"]
+        results["errors"].extend(fallback["errors"])
+    
+    return results
 
 
 def get_labels(service) -> list[dict[str, str]]:
@@ -230,13 +445,30 @@ def get_labels(service) -> list[dict[str, str]]:
         
     Returns:
         List of label dictionaries
+        
+    Raises:
+        Exception: If the labels request fails
     """
-    try:
-        results = service.users().labels().list(userId="me").execute()
-        labels = results.get("labels", [])
-        return [{"id": l["id"], "name": l["name"]} for l in labels]
-    except Exception:
-        return []
+    results = service.users().labels().list(userId="me").execute()
+    labels = results.get("labels", [])
+    return [{"id": l["id"], "name": l["name"]} for l in labels]
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def cached_get_labels(user_key: str, _service) -> list[dict[str, str]]:
+    """
+    Get Gmail labels, cached per user across reruns.
+    
+    Errors are raised rather than handled so failed requests are not cached.
+    
+    Args:
+        user_key: Identifies the authenticated user (cache key)
+        _service: Gmail API service object (excluded from the cache key)
+        
+    Returns:
+        List of label dictionaries
+    """
+    return get_labels(_service)
 
 
 def get_sender_stats(emails: list[dict]) -> dict[str, int]:
@@ -247,16 +479,122 @@ def get_sender_stats(emails: list[dict]) -> dict[str, int]:
         emails: List of email dictionaries
         
     Returns:
-        Dictionary mapping sender to email count
+        Dictionary mapping lowercased sender address to email count,
+        unordered (use top_senders for the highest counts)
+    """
+    return dict(Counter(email["from_addr"] for email in emails))
+
+
+def top_senders(sender_stats: dict[str, int], k: int) -> list[tuple[str, int]]:
+    """
+    Get the senders with the most emails without sorting every sender.
+    
+    Args:
+        sender_stats: Statistics from get_sender_stats
+        k: Number of senders to return
+        
+    Returns:
+        Up to k (sender, count) pairs, highest count first
+    """
+    return heapq.nlargest(k, sender_stats.items(), key=operator.itemgetter(1))
+
+
+def subtract_sender_stats(sender_stats: dict[str, int], emails: list[dict]) -> dict[str, int]:
+    """
+    Remove emails from sender statistics without rescanning the rest.
+    
+    Args:
+        sender_stats: Statistics from get_sender_stats
+        emails: Emails being removed
+        
+    Returns:
+        Updated dictionary mapping sender to email count
+    """
+    sender_counts = dict(sender_stats)
+    for email in emails:
+        sender = email["from_addr"]
+        if sender not in sender_counts:
+            continue
+        sender_counts[sender] -= 1
+        if sender_counts[sender] <= 0:
+            del sender_counts[sender]
+    
+    return sender_counts
+
+
+def extract_sender_address(sender: str) -> str:
+    """
+    Extract the email address from a "Name <email>" From header.
+    
+    Args:
+        sender: Raw From header value
+        
+    Returns:
+        The address inside angle brackets, or the header unchanged
+    """
+    match = _ANGLE_ADDRESS_RE.search(sender)
+    return match.group(1) if match else sender
+
+
+def build_sender_index(emails: list[dict]) -> dict[str, list[str]]:
+    """
+    Index email IDs by sender address.
+    
+    Keys match those of get_sender_stats, so senders taken from the stats
+    or recommendations can be resolved to emails with a dict lookup.
+    
+    Args:
+        emails: List of email dictionaries
+        
+    Returns:
+        Dictionary mapping sender address to email IDs
     """
-    sender_counts = {}
+    index = defaultdict(list)
     for email in emails:
-        sender = email.get("from", "Unknown")
-        # Extract email address from "Name <email>" format
-        if "<" in sender and ">" in sender:
-            sender = sender[sender.find("<")+1:sender.find(">")]
-        sender_counts[sender] = sender_counts.get(sender, 0) + 1
+        index[email["from_addr"]].append(email["id"])
+    return dict(index)
+
+
+def remove_from_sender_index(sender_index: dict[str, list[str]], emails: list[dict]):
+    """
+    Remove emails from a sender index in place.
     
-    # Sort by count descending
-    return dict(sorted(sender_counts.items(), key=lambda x: x[1], reverse=True))
+    Args:
+        sender_index: Index built by build_sender_index
+        emails: Emails being removed
+    """
+    for email in emails:
+        sender = email["from_addr"]
+        ids = sender_index.get(sender)
+        if ids is None or email["id"] not in ids:
+            continue
+        ids.remove(email["id"])
+        if not ids:
+            del sender_index[sender]
+
 
+def find_emails_by_senders(sender_index: dict[str, list[str]], senders: list[str]) -> set[str]:
+    """
+    Resolve senders to email IDs using a sender index.
+    
+    Exact addresses are a dict lookup. Anything else (e.g. a domain or a
+    sender name returned by the AI) falls back to a substring match over
+    the index's unique senders rather than over every email.
+    
+    Args:
+        sender_index: Index built by build_sender_index
+        senders: Sender addresses or fragments to match
+        
+    Returns:
+        Set of matching email IDs
+    """
+    matching_ids = set()
+    for sender in senders:
+        sender = sender.lower()
+        if sender in sender_index:
+            matching_ids.update(sender_index[sender])
+            continue
+        for address, ids in sender_index.items():
+            if sender in address:
+                matching_ids.update(ids)
+    return matching_ids
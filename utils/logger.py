@@ -1,11 +1,23 @@
 """In-memory action logging utility for tracking operations."""
 
+from collections import deque
 from datetime import datetime
 from enum import Enum
+from itertools import islice
 from typing import Any
 
 import streamlit as st
 
+from config import ACTION_LOG_MAX_ENTRIES
+
+
+# Icon shown for each entry status
+STATUS_EMOJI = {
+    "success": "✅",
+    "warning": "⚠️",
+    "error": "❌",
+}
+
 
 class ActionType(Enum):
     """Types of actions that can be logged."""
@@ -20,13 +32,19 @@ class ActionType(Enum):
 class ActionLogger:
     """
     In-memory action logger that stores all operations in Streamlit session state.
+    
+    Entries are kept in a bounded deque (the most recent ACTION_LOG_MAX_ENTRIES),
+    with a per-type index so lookups by type do not scan the whole log. The
+    index holds exactly the entries still in the main log.
     """
     
     @staticmethod
     def init():
         """Initialize the action log in session state."""
         if "action_log" not in st.session_state:
-            st.session_state.action_log = []
+            st.session_state.action_log = deque(maxlen=ACTION_LOG_MAX_ENTRIES)
+        if "action_log_by_type" not in st.session_state:
+            st.session_state.action_log_by_type = {}
     
     @staticmethod
     def log(
@@ -46,15 +64,30 @@ class ActionLogger:
         """
         ActionLogger.init()
         
+        now = datetime.now()
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
+            # Pre-formatted for display so rendering doesn't re-parse timestamps
+            "ts_hms": now.strftime("%H:%M:%S"),
             "type": action_type.value,
             "description": description,
             "details": details or {},
             "status": status,
         }
         
-        st.session_state.action_log.append(entry)
+        log = st.session_state.action_log
+        by_type = st.session_state.action_log_by_type
+        
+        # The oldest entry is about to be evicted; it is also the oldest
+        # entry of its type, so drop it from the type index too
+        if len(log) == log.maxlen:
+            oldest_type = log[0]["type"]
+            by_type[oldest_type].popleft()
+            if not by_type[oldest_type]:
+                del by_type[oldest_type]
+        
+        log.append(entry)
+        by_type.setdefault(action_type.value, deque()).append(entry)
     
     @staticmethod
     def get_logs(limit: int | None = None) -> list[dict]:
@@ -68,11 +101,11 @@ class ActionLogger:
             List of log entries
         """
         ActionLogger.init()
-        logs = list(reversed(st.session_state.action_log))
+        logs = reversed(st.session_state.action_log)
         
         if limit:
-            return logs[:limit]
-        return logs
+            return list(islice(logs, limit))
+        return list(logs)
     
     @staticmethod
     def get_logs_by_type(action_type: ActionType) -> list[dict]:
@@ -86,10 +119,7 @@ class ActionLogger:
             Filtered list of log entries
         """
         ActionLogger.init()
-        return [
-            log for log in st.session_state.action_log
-            if log["type"] == action_type.value
-        ]
+        return list(st.session_state.action_log_by_type.get(action_type.value, ()))
     
     @staticmethod
     def get_deletion_stats() -> dict[str, Any]:
@@ -115,7 +145,8 @@ class ActionLogger:
     @staticmethod
     def clear():
         """Clear all logs."""
-        st.session_state.action_log = []
+        st.session_state.action_log = deque(maxlen=ACTION_LOG_MAX_ENTRIES)
+        st.session_state.action_log_by_type = {}
     
     @staticmethod
     def format_log_entry(entry: dict) -> str:
@@ -128,14 +159,10 @@ class ActionLogger:
         Returns:
             Formatted string
         """
-        timestamp = datetime.fromisoformat(entry["timestamp"]).strftime("%H:%M:%S")
-        status_emoji = {
-            "success": "✅",
-            "warning": "⚠️",
-            "error": "❌",
-        }.get(entry["status"], "ℹ️")
+        status_emoji = STATUS_EMOJI.get(entry.get("status", "success"), "ℹ️")
+        time_str = entry.get("ts_hms", "??:??:??")
         
-        return f"[{timestamp}] {status_emoji} {entry['description']}"
+        return f"[{time_str}] {status_emoji} {entry['description']}"
 
 
 # Convenience functions for common logging operations